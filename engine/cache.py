@@ -0,0 +1,318 @@
+# backtestr/engine/cache.py
+import hashlib
+import inspect
+import os
+import pickle
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+class ResultCache:
+    """
+    Content-addressed on-disk cache of backtest results.
+    Entries are keyed by a hash of everything that determines a run's outcome,
+    so an identical run is served from disk and any input change misses.
+    """
+
+    def __init__(self, cache_dir=".backtest_cache", max_bytes=512 * 1024 * 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory where cached results are stored
+            max_bytes: Size bound for the cache; least recently used entries are evicted past it
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def make_key(self, data, timeline, strategy, execution_model, initial_cash, risk_limits=None,
+                 lot_method=None):
+        """
+        Build the cache key for a run.
+
+        Args:
+            data: dict {symbol: DataFrame} or DataFrame for single symbol
+            timeline: list of timestamps the run iterates through
+            strategy: Strategy instance, hashed by class and parameters before the run
+            execution_model: ExecutionModel instance
+            initial_cash: Starting cash of the portfolio
+            risk_limits: RiskLimits the run's orders are checked against, if any
+            lot_method: Lot relief method of the portfolio ("average", "fifo" or "lifo")
+
+        Returns:
+            str: Hex digest identifying the run
+        """
+        h = hashlib.sha256()
+        h.update(dataset_fingerprint(data).encode())
+        h.update(pd.util.hash_pandas_object(pd.Series(timeline), index=False).values.tobytes())
+        h.update(config_fingerprint(strategy, execution_model, initial_cash, risk_limits,
+                                    lot_method).encode())
+        return h.hexdigest()
+
+    def get(self, key):
+        """
+        Load a cached result.
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            dict or None: Cached result, or None on a miss
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                result = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+
+        # Touch the entry so LRU eviction sees it as recently used
+        os.utime(path, None)
+        return result
+
+    def put(self, key, portfolio, risk_events=None, strategy=None):
+        """
+        Store the results of a finished run.
+
+        Args:
+            key: Cache key from make_key
+            portfolio: Portfolio after the run completed
+            risk_events: RiskEvents of orders the run's risk checks rejected, if any
+            strategy: Strategy after the run, whose attributes are restored on a hit
+
+        Returns:
+            bool: True if the result was stored, False if the strategy state cannot be pickled
+        """
+        try:
+            strategy_state = pickle.dumps(vars(strategy), protocol=pickle.HIGHEST_PROTOCOL) \
+                if strategy is not None else None
+        except (pickle.PicklingError, TypeError, AttributeError):
+            # A hit could not hand back the strategy as the run left it
+            return False
+
+        result = {
+            "equity_history": portfolio.equity_history,
+            "trade_history": portfolio.trade_history,
+            "daily_pnl": portfolio.daily_pnl,
+            "cash": portfolio.cash,
+            "positions": portfolio.positions,
+            "lots": portfolio.lots,
+            "realized_pnl": portfolio.realized_pnl,
+            "unrealized_pnl": portfolio.unrealized_pnl,
+            "risk_events": list(risk_events or []),
+            "strategy_state": strategy_state,
+            "summary": {
+                "final_equity": portfolio.get_current_equity(),
+                "total_return": portfolio.get_total_return(),
+                "total_return_pct": portfolio.get_total_return_pct(),
+                "num_trades": len(portfolio.trade_history),
+                "realized_pnl": portfolio.realized_pnl,
+            },
+        }
+
+        # Write atomically so concurrent readers never see a partial entry
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+        self._evict()
+        return True
+
+    def restore(self, result, portfolio, strategy=None):
+        """
+        Load a cached result into a portfolio (and strategy) as if the run had just finished.
+
+        Args:
+            result: Cached result from get
+            portfolio: Portfolio instance to populate
+            strategy: Strategy instance to give the attributes it had after the cached run
+
+        Returns:
+            list: RiskEvents the cached run's risk checks recorded
+        """
+        portfolio.equity_history = list(result["equity_history"])
+        portfolio.trade_history = list(result["trade_history"])
+        portfolio.daily_pnl = list(result["daily_pnl"])
+        portfolio.cash = result["cash"]
+        portfolio.positions = {symbol: dict(pos) for symbol, pos in result["positions"].items()}
+        portfolio.lots = result["lots"]
+        portfolio.realized_pnl = result["realized_pnl"]
+        portfolio.unrealized_pnl = result["unrealized_pnl"]
+        if strategy is not None and result.get("strategy_state") is not None:
+            vars(strategy).update(pickle.loads(result["strategy_state"]))
+        return list(result.get("risk_events", []))
+
+    def clear(self):
+        """Remove every cached entry."""
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".pkl"):
+                os.remove(os.path.join(self.cache_dir, name))
+
+    def size_bytes(self):
+        """Get the total size of cached entries."""
+        return sum(size for _, size, _ in self._entries())
+
+    def _path(self, key):
+        """Get the file path for a cache key."""
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def _entries(self):
+        """List cached entries as (path, size, last_used) tuples."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".pkl"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+
+        for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+def dataset_fingerprint(data):
+    """
+    Hash the contents of a dataset.
+
+    Args:
+        data: dict {symbol: DataFrame} or DataFrame for single symbol
+
+    Returns:
+        str: Hex digest that changes whenever any value, column or symbol changes
+    """
+    if isinstance(data, pd.DataFrame):
+        data = {"data": data}
+
+    h = hashlib.sha256()
+    for symbol in sorted(data):
+        df = data[symbol]
+        h.update(str(symbol).encode())
+        h.update(repr(list(df.columns)).encode())
+        h.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return h.hexdigest()
+
+
+def config_fingerprint(strategy, execution_model, initial_cash, risk_limits=None, lot_method=None):
+    """
+    Hash the configuration of a run.
+
+    Args:
+        strategy: Strategy instance, hashed by class, class source and current attributes
+        execution_model: ExecutionModel instance
+        initial_cash: Starting cash of the portfolio
+        risk_limits: RiskLimits the run's orders are checked against, if any
+        lot_method: Lot relief method of the portfolio, which sets per-trade realized P&L
+
+    Returns:
+        str: Hex digest that changes whenever any parameter or the strategy's code changes
+
+    Raises:
+        TypeError: If the strategy's source cannot be found (e.g. a class defined interactively)
+    """
+    h = hashlib.sha256()
+
+    # Strategy identity: fully qualified class, its code and its constructor-time attributes
+    strategy_cls = type(strategy)
+    h.update(f"{strategy_cls.__module__}.{strategy_cls.__qualname__}".encode())
+    _hash_source(h, strategy_cls)
+    _hash_value(h, vars(strategy))
+
+    _hash_value(h, vars(execution_model))
+    h.update(repr(float(initial_cash)).encode())
+
+    # Limits change which orders fill; unlimited runs keep their existing keys
+    if risk_limits is not None:
+        _hash_value(h, vars(risk_limits))
+    if lot_method is not None:
+        h.update(f"lots:{lot_method};".encode())
+    return h.hexdigest()
+
+
+def _hash_source(h, cls):
+    """
+    Feed the source of a class and its Python base classes into a hash,
+    so editing a strategy's logic misses instead of serving stale results.
+    Falls back to the whole module file when the class source cannot be isolated.
+
+    Raises:
+        TypeError: If neither the class source nor its module file can be read
+    """
+    for base in cls.__mro__:
+        if base.__module__ == "builtins":
+            continue
+        try:
+            source = inspect.getsource(base).encode()
+        except (OSError, TypeError):
+            path = getattr(sys.modules.get(base.__module__), "__file__", None)
+            try:
+                with open(path, "rb") as f:
+                    source = f.read()
+            except (OSError, TypeError):
+                raise TypeError(f"Cannot build a stable cache key for {base.__qualname__}: its source "
+                                f"is not available; define it in a module file or run without a cache")
+        h.update(f"source:{len(source)};".encode())
+        h.update(source)
+
+
+def _hash_value(h, value):
+    """
+    Feed a parameter value into a hash by content.
+    Arrays and DataFrames are hashed by their data, since their repr is truncated.
+
+    Raises:
+        TypeError: If the value has no stable content to hash (e.g. a default object repr)
+    """
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes, np.generic)):
+        h.update(f"{type(value).__name__}:{value!r};".encode())
+    elif isinstance(value, np.ndarray):
+        h.update(f"ndarray:{value.dtype.str}:{value.shape};".encode())
+        if value.dtype == object:
+            for item in value.ravel():
+                _hash_value(h, item)
+        else:
+            h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (pd.DataFrame, pd.Series)):
+        h.update(f"{type(value).__name__}:{list(getattr(value, 'columns', [value.name]))!r};".encode())
+        h.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+    elif isinstance(value, (list, tuple)):
+        h.update(f"{type(value).__name__}:{len(value)};".encode())
+        for item in value:
+            _hash_value(h, item)
+    elif isinstance(value, dict):
+        h.update(f"dict:{len(value)};".encode())
+        for key in sorted(value, key=repr):
+            _hash_value(h, key)
+            _hash_value(h, value[key])
+    elif isinstance(value, (set, frozenset)):
+        h.update(f"{type(value).__name__}:{len(value)};".encode())
+        for item in sorted(value, key=repr):
+            _hash_value(h, item)
+    elif isinstance(value, type):
+        h.update(f"type:{value.__module__}.{value.__qualname__};".encode())
+    elif isinstance(value, (pd.Timestamp, pd.Timedelta)) or type(value).__repr__ is not object.__repr__:
+        h.update(f"{type(value).__qualname__}:{value!r};".encode())
+    else:
+        raise TypeError(f"Cannot build a stable cache key for {type(value).__qualname__} value {value!r}; "
+                        f"give it a content-based __repr__ or run without a cache")
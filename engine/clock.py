@@ -1,47 +1,185 @@
 # backtestr/engine/clock.py
+import numpy as np
+import pandas as pd
+
 class Clock:
     """
     Manages time progression in the backtest.
     Iterates through timestamps to advance the simulation.
+
+    Timestamps are held in a datetime64[ns] array (UTC for tz-aware input).
+    Runs over a sub-range or a filtered calendar iterate over views of that
+    array, so many short windows can share one large timeline without copying.
     """
-    
+
     def __init__(self, timeline):
         """
         Initialize clock with a timeline.
-        
+
         Args:
-            timeline: List of timestamps to iterate through
+            timeline: Sorted timestamps to iterate through (list, DatetimeIndex or datetime64 array)
         """
-        self.timeline = timeline
-        self.current_index = 0  # Current position in timeline
-    
+        self.index = pd.DatetimeIndex(timeline)  # Keeps the original timezone for yielded timestamps
+        self.tz = self.index.tz
+        utc = self.index.tz_convert(None) if self.tz is not None else self.index
+        self.timeline = utc.values.astype("datetime64[ns]")
+
+        self._all_positions = np.arange(len(self.timeline))
+        self._positions = self._all_positions  # Timeline positions after calendar filtering
+        self._window = self._positions  # Positions of the current run
+        self.current_index = 0  # Current position in the run
+
     def __iter__(self):
         """Make clock iterable."""
         return self
-    
+
     def __next__(self):
         """Get next timestamp."""
-        if self.current_index >= len(self.timeline):
+        if self.current_index >= len(self._window):
             raise StopIteration
-        
-        timestamp = self.timeline[self.current_index]
+
+        timestamp = self.index[self._window[self.current_index]]
         self.current_index += 1
         return timestamp
-    
+
+    def __len__(self):
+        """Number of timestamps in the current run."""
+        return len(self._window)
+
     def has_next(self):
         """Check if there are more timestamps."""
-        return self.current_index < len(self.timeline)
-    
+        return self.current_index < len(self._window)
+
     def next(self):
         """Get next timestamp (legacy method)."""
         return self.__next__()
-    
+
     def reset(self):
         """Reset clock to beginning."""
         self.current_index = 0
-    
+
     def get_current_timestamp(self):
         """Get current timestamp."""
-        if self.current_index > 0 and self.current_index <= len(self.timeline):
-            return self.timeline[self.current_index - 1]
+        if self.current_index > 0 and self.current_index <= len(self._window):
+            return self.index[self._window[self.current_index - 1]]
         return None
+
+    def seek(self, timestamp):
+        """
+        Move to the first timestamp at or after the given time.
+
+        Args:
+            timestamp: Time to seek to
+
+        Returns:
+            int: New position in the current run
+        """
+        self.current_index = int(np.searchsorted(self._window, self.position_of(timestamp), side="left"))
+        return self.current_index
+
+    def position_of(self, timestamp, side="left"):
+        """
+        Binary-search a time in the full timeline.
+
+        Args:
+            timestamp: Time to look up
+            side: "left" for the first position at or after it, "right" for the first after it
+
+        Returns:
+            int: Position in the timeline
+        """
+        return int(np.searchsorted(self.timeline, self._to_datetime64(timestamp), side=side))
+
+    def run(self, start=None, end=None):
+        """
+        Restrict iteration to timestamps between start and end (inclusive) and rewind.
+
+        Args:
+            start: First time to include (None = beginning of timeline)
+            end: Last time to include (None = end of timeline)
+
+        Returns:
+            Clock: self, ready to iterate over the window
+        """
+        lo = 0 if start is None else self.position_of(start, side="left")
+        hi = len(self.timeline) if end is None else self.position_of(end, side="right")
+
+        # Positions are sorted, so the window is a slice (a view) of them
+        first, last = np.searchsorted(self._positions, [lo, hi])
+        self._window = self._positions[first:last]
+        self.current_index = 0
+        return self
+
+    def window(self):
+        """Get the datetime64 timestamps of the current run."""
+        window = self._window
+        if len(window) and window[-1] - window[0] + 1 == len(window):
+            # Contiguous run: a slice, so no copy
+            return self.timeline[window[0]:window[-1] + 1]
+        return self.timeline[window]
+
+    def filter(self, mask):
+        """
+        Only iterate timestamps where mask is True; clears any run window.
+
+        Args:
+            mask: Boolean array aligned with the timeline, or None to remove the filter
+        """
+        if mask is None:
+            self._positions = self._all_positions
+        else:
+            self._positions = np.flatnonzero(np.asarray(mask, dtype=bool))
+        self._window = self._positions
+        self.current_index = 0
+
+    def session_mask(self, start_time=None, end_time=None, weekdays=(0, 1, 2, 3, 4)):
+        """
+        Build a trading-session mask, evaluated in the timeline's own timezone.
+
+        Args:
+            start_time: Session open, e.g. "09:30" (None = no lower bound)
+            end_time: Session close, inclusive, e.g. "16:00" (None = no upper bound)
+            weekdays: Days of week to keep (Monday = 0)
+
+        Returns:
+            np.ndarray: Boolean mask aligned with the timeline
+        """
+        mask = np.isin(self.index.dayofweek, weekdays)
+        time_of_day = (self.index - self.index.normalize()).values.astype("timedelta64[ns]").astype(np.int64)
+        if start_time is not None:
+            mask &= time_of_day >= _time_of_day_ns(start_time)
+        if end_time is not None:
+            mask &= time_of_day <= _time_of_day_ns(end_time)
+        return mask
+
+    def calendar_mask(self, holidays):
+        """
+        Build a mask that drops whole calendar days, e.g. exchange holidays.
+
+        Args:
+            holidays: Dates to exclude, in the timeline's own timezone
+
+        Returns:
+            np.ndarray: Boolean mask aligned with the timeline
+        """
+        days = self.index.normalize()
+        if self.tz is not None:
+            days = days.tz_localize(None)
+        holidays = pd.DatetimeIndex(holidays).normalize().values.astype("datetime64[ns]")
+        return ~np.isin(days.values.astype("datetime64[ns]"), holidays)
+
+    def _to_datetime64(self, timestamp):
+        """Convert a timestamp to the clock's datetime64 representation."""
+        ts = pd.Timestamp(timestamp)
+        if ts.tzinfo is not None:
+            ts = ts.tz_convert(None)
+        elif self.tz is not None:
+            ts = ts.tz_localize(self.tz).tz_convert(None)
+        return np.datetime64(ts.to_datetime64(), "ns")
+
+
+def _time_of_day_ns(value):
+    """Convert "HH:MM[:SS]" or a datetime.time to nanoseconds since midnight."""
+    t = pd.Timestamp(str(value)).time()
+    seconds = t.hour * 3600 + t.minute * 60 + t.second
+    return seconds * 1_000_000_000 + t.microsecond * 1000
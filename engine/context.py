@@ -1,13 +1,16 @@
 # backtestr/engine/context.py
+import numpy as np
 import pandas as pd
 
+from engine.features import FeatureStore, data_version
+
 class Context:
     """
     Provides an interface for strategies to interact with the engine.
     Gives strategies access to market data, portfolio state, and order submission.
     """
     
-    def __init__(self, data, portfolio, execution_model):
+    def __init__(self, data, portfolio, execution_model, risk_manager=None, feature_store=None):
         """
         Initialize the context.
         
@@ -15,11 +18,15 @@ class Context:
             data: dict {symbol: DataFrame} or DataFrame for single symbol
             portfolio: Portfolio instance
             execution_model: ExecutionModel instance
+            risk_manager: Optional RiskManager checking orders before they fill
+            feature_store: Optional FeatureStore shared across runs
         """
         self.data = data
         self.portfolio = portfolio
         self.execution_model = execution_model
-        self.current_timestamp = None  # Current time in backtest
+        self.risk_manager = risk_manager
+        self.feature_store = feature_store
+        self._versions = {}  # column -> data version, computed on first feature lookup
         
         # Handle single symbol data (from yfinance)
         if isinstance(data, pd.DataFrame):
@@ -27,6 +34,84 @@ class Context:
             self.data = {"data": data}
         else:
             self.symbols = list(data.keys())
+        
+        self._build_universe()
+        self.current_timestamp = None  # Current time in backtest
+    
+    def _build_universe(self):
+        """
+        Align every symbol's closes into one (timestamps x symbols) matrix.
+        Built once so per-bar price lookups are array indexing, not DataFrame filters.
+        """
+        self._column = {symbol: i for i, symbol in enumerate(self.symbols)}
+        closes = [df.set_index("timestamp")["close"] for df in self.data.values()]
+        
+        if closes:
+            aligned = pd.concat(closes, axis=1, keys=range(len(closes))).sort_index()
+            self._close = aligned.to_numpy(dtype=float)
+            index = pd.DatetimeIndex(aligned.index)
+        else:
+            self._close = np.empty((0, 0))
+            index = pd.DatetimeIndex([])
+        self._close.flags.writeable = False  # Views handed to strategies are read-only
+        
+        # Row lookup by binary search over epoch nanoseconds (UTC for tz-aware data),
+        # so setup stays vectorized instead of building a per-timestamp dict
+        self._tz = index.tz
+        utc = index.tz_convert(None) if self._tz is not None else index
+        self._times = utc.values.astype("datetime64[ns]").view(np.int64)
+        
+        self._risk_idx = None  # Universe -> risk manager vector positions, resolved lazily
+        self.set_portfolio(self.portfolio)
+    
+    def set_portfolio(self, portfolio):
+        """
+        Point the context at a portfolio, e.g. a fresh one for another run over the same data.
+        
+        Args:
+            portfolio: Portfolio instance
+        """
+        self.portfolio = portfolio
+        
+        # Universe-aligned position vector, kept in step with fills made through this context
+        self._qty = np.zeros(len(self.symbols))
+        for symbol, pos in portfolio.positions.items():
+            if symbol in self._column:
+                self._qty[self._column[symbol]] = pos["qty"]
+    
+    @property
+    def current_timestamp(self):
+        """Current time in backtest."""
+        return self._current_timestamp
+    
+    @current_timestamp.setter
+    def current_timestamp(self, timestamp):
+        self._current_timestamp = timestamp
+        self._row = self._row_at(timestamp) if timestamp is not None else -1
+    
+    def _row_at(self, timestamp):
+        """Find the universe row of a timestamp, or -1 if no symbol has a bar then."""
+        if not len(self._times):
+            return -1
+        ts = timestamp if isinstance(timestamp, pd.Timestamp) else pd.Timestamp(timestamp)
+        if (ts.tzinfo is None) != (self._tz is None):
+            return -1
+        value = ts.value
+        row = int(self._times.searchsorted(value))
+        if row < len(self._times) and self._times[row] == value:
+            return row
+        return -1
+    
+    def mark_risk(self):
+        """Push the current bar's prices to the risk manager so its limits see current marks."""
+        if self.risk_manager is not None and self._row >= 0:
+            self.risk_manager.mark(self._risk_indices(), self._close[self._row])
+    
+    def _risk_indices(self):
+        """Get the risk manager's vector positions for the universe, resolved on first use."""
+        if self._risk_idx is None:
+            self._risk_idx = self.risk_manager.index_of(self.symbols)
+        return self._risk_idx
     
     def price(self, symbol):
         """
@@ -39,20 +124,96 @@ class Context:
             float: Current close price
         """
         # For yfinance data, we use "data" as the key
-        data_key = "data"
-        if data_key not in self.data:
+        col = self._column.get(symbol, self._column.get("data"))
+        if col is None or self._row < 0:
             return None
         
-        df = self.data[data_key]
-        if self.current_timestamp is None:
+        price = self._close[self._row, col]
+        if np.isnan(price):
             return None
         
-        # Find the current bar
-        current_bar = df[df['timestamp'] == self.current_timestamp]
-        if current_bar.empty:
+        return float(price)
+    
+    def position_prices(self):
+        """
+        Get current prices for every held symbol that has a bar now.
+        
+        Returns:
+            dict: {symbol: current close price}, for marking the portfolio to market
+        """
+        prices = {}
+        if self._row < 0:
+            return prices
+        
+        row = self._close[self._row]
+        for symbol, pos in self.portfolio.positions.items():
+            col = self._column.get(symbol)
+            if col is not None and pos["qty"] != 0 and not np.isnan(row[col]):
+                prices[symbol] = float(row[col])
+        return prices
+    
+    def feature(self, symbol, name, **params):
+        """
+        Get a derived series (e.g. "sma", "momentum") up to and including the current bar.
+        
+        Args:
+            symbol: Symbol to get the series for
+            name: Indicator name registered in the feature store
+            **params: Indicator parameters, e.g. window=20
+            
+        Returns:
+            np.ndarray: Read-only series ending at the current bar, or None without a price
+                        (NaN on earlier bars the symbol did not have)
+        """
+        col = self._column.get(symbol, self._column.get("data"))
+        if col is None or self._row < 0 or np.isnan(self._close[self._row, col]):
             return None
         
-        return float(current_bar.iloc[0]['close'])
+        if self.feature_store is None:
+            self.feature_store = FeatureStore()
+        
+        close = self._close[:, col]
+        if col not in self._versions:
+            self._versions[col] = data_version(close)
+        
+        series = self.feature_store.get(self.symbols[col], self._versions[col], close, name, **params)
+        return series[:self._row + 1]
+    
+    def prices(self):
+        """
+        Get current close prices for the whole universe.
+        
+        Returns:
+            np.ndarray: Read-only prices aligned with ctx.symbols (NaN where a symbol has no bar)
+        """
+        if self._row < 0:
+            return np.full(len(self.symbols), np.nan)
+        return self._close[self._row]
+    
+    def returns(self, lookback=1):
+        """
+        Get trailing returns for the whole universe.
+        
+        Args:
+            lookback: Number of bars to look back
+            
+        Returns:
+            np.ndarray: Returns aligned with ctx.symbols (NaN until enough history)
+        """
+        if self._row < lookback:
+            return np.full(len(self.symbols), np.nan)
+        return self._close[self._row] / self._close[self._row - lookback] - 1
+    
+    def positions(self):
+        """
+        Get current positions for the whole universe.
+        
+        Returns:
+            np.ndarray: Read-only signed quantities aligned with ctx.symbols
+        """
+        view = self._qty.view()
+        view.flags.writeable = False
+        return view
     
     def position(self, symbol):
         """
@@ -90,7 +251,10 @@ class Context:
         
         # Simulate immediate fill at current price
         fill_price = current_price
+        if not self._risk_approved(symbol, qty, fill_price):
+            return
         self.portfolio.apply_fill(symbol, qty, fill_price)
+        self._record_fill(symbol, qty, fill_price)
         
         print(f"📊 Market order executed: {qty} {symbol} @ ${fill_price:.2f}")
     
@@ -111,7 +275,92 @@ class Context:
         # Check if limit order can be filled
         if (qty > 0 and current_price <= limit_price) or (qty < 0 and current_price >= limit_price):
             # Limit order can be filled
+            if not self._risk_approved(symbol, qty, limit_price):
+                return
             self.portfolio.apply_fill(symbol, qty, limit_price)
+            self._record_fill(symbol, qty, limit_price)
             print(f"📊 Limit order filled: {qty} {symbol} @ ${limit_price:.2f}")
         else:
             print(f"⏳ Limit order pending: {qty} {symbol} @ ${limit_price:.2f} (current: ${current_price:.2f})")
+    
+    def _risk_approved(self, symbol, qty, price):
+        """
+        Run an order through the risk manager, if one is attached.
+        
+        Returns:
+            bool: True if the order may be filled
+        """
+        if self.risk_manager is None:
+            return True
+        
+        accepted, events = self.risk_manager.check([symbol], [qty], [price],
+                                                   self.portfolio.cash, self.current_timestamp)
+        for event in events:
+            print(f"🛑 Order rejected ({event.reason}): {qty} {symbol} @ ${price:.2f}")
+        return bool(accepted[0])
+    
+    def _record_fill(self, symbol, qty, price):
+        """Keep the position vectors in step with the portfolio."""
+        if symbol in self._column:
+            self._qty[self._column[symbol]] += qty
+        if self.risk_manager is not None:
+            self.risk_manager.record_fill(symbol, qty, price)
+    
+    def order_target_qty(self, targets):
+        """
+        Trade the whole universe towards target quantities in one batch.
+        
+        Args:
+            targets: Target quantities aligned with ctx.symbols (rounded toward zero to whole shares)
+            
+        Returns:
+            int: Number of orders filled
+        """
+        targets = np.fix(np.asarray(targets, dtype=float))
+        prices = self.prices()
+        
+        # No price, no trade
+        diffs = np.where(np.isnan(prices), 0, targets - self._qty)
+        cols = np.flatnonzero(diffs)
+        if len(cols) == 0:
+            return 0
+        
+        # Sells first so freed cash is available to the buys
+        cols = cols[np.argsort(diffs[cols] > 0, kind="stable")]
+        qtys = diffs[cols]
+        fill_prices = prices[cols]
+        
+        if self.risk_manager is not None:
+            risk_idx = self._risk_indices()[cols]
+            accepted, events = self.risk_manager.check_indexed(
+                risk_idx, qtys, fill_prices, self.portfolio.cash, self.current_timestamp)
+            if events:
+                print(f"🛑 {len(events)} orders rejected by risk checks")
+            cols, qtys, fill_prices, risk_idx = cols[accepted], qtys[accepted], fill_prices[accepted], risk_idx[accepted]
+            self.risk_manager.record_fills(risk_idx, qtys, fill_prices)
+        
+        self.portfolio.apply_fills([self.symbols[c] for c in cols], qtys.astype(np.int64).tolist(),
+                                   fill_prices.tolist())
+        self._qty[cols] += qtys
+        
+        print(f"📊 Batch executed: {len(cols)} orders")
+        return len(cols)
+    
+    def order_target_weights(self, weights):
+        """
+        Trade the whole universe towards target portfolio weights in one batch.
+        
+        Args:
+            weights: Target fractions of equity aligned with ctx.symbols (negative = short)
+            
+        Returns:
+            int: Number of orders filled
+        """
+        prices = self.prices()
+        priced = ~np.isnan(prices)
+        equity = self.portfolio.cash + np.dot(self._qty[priced], prices[priced])
+        
+        with np.errstate(divide="ignore", invalid="ignore"):
+            targets = np.asarray(weights, dtype=float) * equity / prices
+        targets = np.where(priced, targets, self._qty)
+        return self.order_target_qty(targets)
@@ -0,0 +1,298 @@
+# backtestr/engine/distributed.py
+import contextlib
+import multiprocessing
+import os
+import queue
+import threading
+import traceback
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener, answer_challenge, deliver_challenge
+
+from engine.engine import Engine
+from execution.fills import ExecutionModel
+from portfolio.portfolio import Portfolio
+
+
+class Coordinator:
+    """
+    Splits a parameter sweep into shards and hands them to workers over TCP
+    (or a local socket path). Workers pull shards, stream per-job results back,
+    and any shard held by a worker that disconnects (or misses its job deadline)
+    is reassigned.
+
+    Messages are pickled, so only peers holding the authkey may connect; keep
+    the key secret and bind to a trusted network.
+    """
+
+    def __init__(self, data, jobs, address=("localhost", 0), authkey=None,
+                 batch_size=8, initial_cash=100000, execution_params=None, job_timeout=None):
+        """
+        Initialize the coordinator.
+
+        Args:
+            data: dict {symbol: DataFrame} or DataFrame for single symbol, shipped once per worker
+            jobs: list of (strategy_class, params) tuples to run
+            address: (host, port) for TCP or a filesystem path for a local socket
+            authkey: Shared secret workers must present (None = generate a random key,
+                     exposed as coordinator.authkey)
+            batch_size: Number of jobs per shard, to amortize per-task overhead
+            initial_cash: Starting cash for every run
+            execution_params: kwargs for ExecutionModel
+            job_timeout: Seconds a worker may spend on one job (None = no deadline). A job that
+                         overruns is reported with an "error" summary, its worker is dropped
+                         and the rest of its shard is reassigned.
+        """
+        self.data = data
+        self.jobs = list(jobs)
+        self.authkey = authkey if authkey is not None else os.urandom(32)
+        self.batch_size = batch_size
+        self.job_timeout = job_timeout
+        self.config = {
+            "initial_cash": initial_cash,
+            "execution_params": execution_params or {},
+        }
+
+        # The authkey handshake runs per connection in _serve_worker, off the accept thread
+        self.listener = Listener(address)
+        self.address = self.listener.address
+
+        self._pending = queue.Queue()  # Shards waiting for a worker
+        self._results = queue.Queue()  # (job_id, params, summary) as they arrive
+        self._completed = set()
+        self._lock = threading.Lock()
+        self._all_done = threading.Event()
+        self.live_workers = 0  # Workers currently connected
+
+        for start in range(0, len(self.jobs), batch_size):
+            job_ids = range(start, min(start + batch_size, len(self.jobs)))
+            self._pending.put([(job_id, *self.jobs[job_id]) for job_id in job_ids])
+
+        if not self.jobs:
+            self._all_done.set()
+
+    def start(self):
+        """Start accepting worker connections in the background."""
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def results(self, timeout=None):
+        """
+        Stream results as workers report them.
+        A job whose strategy raised yields a summary with an "error" key.
+
+        Args:
+            timeout: Seconds to wait for the next result before giving up (None = forever)
+
+        Yields:
+            tuple: (job_id, params, summary) in completion order
+
+        Raises:
+            TimeoutError: If no result arrives within timeout, e.g. because no workers are left
+        """
+        remaining = len(self.jobs)
+        while remaining:
+            try:
+                yield self._results.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError(f"No sweep result within {timeout}s: {remaining} jobs outstanding, "
+                                   f"{self.live_workers} workers connected") from None
+            remaining -= 1
+
+    def run(self, timeout=None):
+        """
+        Start the coordinator and collect every result.
+
+        Args:
+            timeout: Seconds to wait for each next result before giving up (None = forever)
+
+        Returns:
+            list: (job_id, params, summary) tuples ordered by job_id
+        """
+        self.start()
+        try:
+            return sorted(self.results(timeout), key=lambda result: result[0])
+        finally:
+            self.close()
+
+    def close(self):
+        """Stop accepting workers."""
+        self._all_done.set()
+        self.listener.close()
+
+    def _accept_loop(self):
+        """Accept workers until the sweep is finished."""
+        while not self._all_done.is_set():
+            try:
+                conn = self.listener.accept()
+            except (OSError, EOFError, AuthenticationError):
+                # Listener closed, or a client dropped while connecting
+                if self._all_done.is_set():
+                    return
+                continue
+            threading.Thread(target=self._serve_worker, args=(conn,), daemon=True).start()
+
+    def _serve_worker(self, conn):
+        """Feed shards to one worker until the sweep is done or the worker drops."""
+        try:
+            # Mutual authentication, as Listener/Client do; a bad or stalled client only stalls this thread
+            deliver_challenge(conn, self.authkey)
+            answer_challenge(conn, self.authkey)
+        except (OSError, EOFError, AuthenticationError):
+            conn.close()
+            return
+
+        shard = None
+        with self._lock:
+            self.live_workers += 1
+        try:
+            conn.send(("init", self.data, self.config))
+            while True:
+                conn.recv()  # Worker is ready for work
+                shard = self._next_shard()
+                if shard is None:
+                    conn.send(("stop",))
+                    return
+
+                conn.send(("shard", shard))
+                for job_id, _, _ in shard:
+                    if self.job_timeout is not None and not conn.poll(self.job_timeout):
+                        # Hung strategy or frozen host: give up on this job and drop the worker
+                        self._record(job_id, {"error": f"TimeoutError: no result within {self.job_timeout}s"})
+                        raise TimeoutError
+                    _, job_id, summary = conn.recv()
+                    self._record(job_id, summary)
+                shard = None
+        except (OSError, EOFError, TimeoutError):
+            # Worker died mid-shard: put back whatever it had not finished
+            if shard is not None:
+                with self._lock:
+                    unfinished = [job for job in shard if job[0] not in self._completed]
+                if unfinished:
+                    self._pending.put(unfinished)
+        finally:
+            with self._lock:
+                self.live_workers -= 1
+            conn.close()
+
+    def _next_shard(self):
+        """Wait for a shard; None once every job has completed."""
+        while not self._all_done.is_set():
+            try:
+                return self._pending.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
+
+    def _record(self, job_id, summary):
+        """Record a job result, ignoring duplicates from reassigned shards."""
+        with self._lock:
+            if job_id in self._completed:
+                return
+            self._completed.add(job_id)
+            done = len(self._completed) == len(self.jobs)
+
+        self._results.put((job_id, self.jobs[job_id][1], summary))
+        if done:
+            self._all_done.set()
+
+
+def run_worker(address, authkey):
+    """
+    Connect to a coordinator and run shards until told to stop.
+
+    Args:
+        address: Coordinator address, as exposed by Coordinator.address
+        authkey: Shared secret matching the coordinator (Coordinator.authkey)
+    """
+    conn = Client(address, authkey=authkey)
+    engine = None  # Built once and reset per job, so the universe is aligned once per worker
+    try:
+        _, data, config = conn.recv()
+        while True:
+            conn.send(("ready",))
+            message = conn.recv()
+            if message[0] == "stop":
+                return
+
+            for job_id, strategy_cls, params in message[1]:
+                try:
+                    if engine is None:
+                        engine = _build_engine(data, **config)
+                    summary = run_job(data, strategy_cls, params, engine=engine, **config)
+                except Exception as e:
+                    # A failing strategy must not take the worker (and then every other worker) down
+                    summary = {"error": f"{type(e).__name__}: {e}", "traceback": traceback.format_exc()}
+                conn.send(("result", job_id, summary))
+    except (OSError, EOFError):
+        # Coordinator went away; nothing left to do
+        pass
+    finally:
+        conn.close()
+
+
+def start_local_workers(address, num_workers, authkey):
+    """
+    Spawn worker processes on this machine.
+
+    Args:
+        address: Coordinator address
+        num_workers: Number of worker processes
+        authkey: Shared secret matching the coordinator
+
+    Returns:
+        list: Started multiprocessing.Process objects
+    """
+    workers = []
+    for _ in range(num_workers):
+        worker = multiprocessing.Process(target=run_worker, args=(address, authkey), daemon=True)
+        worker.start()
+        workers.append(worker)
+    return workers
+
+
+def run_job(data, strategy_cls, params, initial_cash=100000, execution_params=None, engine=None):
+    """
+    Run a single backtest and summarize it.
+
+    Args:
+        data: dict {symbol: DataFrame} or DataFrame for single symbol
+        strategy_cls: Strategy class to instantiate
+        params: kwargs for the strategy
+        initial_cash: Starting cash
+        execution_params: kwargs for ExecutionModel
+        engine: Optional engine over the same data and execution settings to reuse;
+                it is reset with a fresh portfolio
+
+    Returns:
+        dict: Summary metrics for the run
+    """
+    portfolio = Portfolio(initial_cash)
+    if engine is None:
+        engine = _build_engine(data, initial_cash, execution_params)
+    engine.reset(portfolio)
+
+    # Per-order logging would swamp the worker's output
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        engine.run(strategy_cls(**params))
+
+    return {
+        "final_equity": portfolio.get_current_equity(),
+        "total_return": portfolio.get_total_return(),
+        "total_return_pct": portfolio.get_total_return_pct(),
+        "num_trades": len(portfolio.trade_history),
+        "cash": portfolio.cash,
+    }
+
+
+def _build_engine(data, initial_cash=100000, execution_params=None):
+    """Build an engine over the dataset's full timeline."""
+    return Engine(data, _timeline(data), Portfolio(initial_cash), ExecutionModel(**(execution_params or {})))
+
+
+def _timeline(data):
+    """Build the run timeline from the dataset's timestamps."""
+    if isinstance(data, dict):
+        timestamps = set()
+        for df in data.values():
+            timestamps.update(df["timestamp"].tolist())
+        return sorted(timestamps)
+    return data["timestamp"].tolist()
@@ -11,7 +11,8 @@ class Engine:
     Coordinates data, portfolio, and strategy execution.
     """
     
-    def __init__(self, data, timeline, portfolio, execution_model):
+    def __init__(self, data, timeline, portfolio, execution_model, cache=None, risk_manager=None,
+                 feature_store=None):
         """
         Initialize the engine.
         
@@ -20,13 +21,21 @@ class Engine:
             timeline: list of timestamps to iterate through
             portfolio: Portfolio instance
             execution_model: ExecutionModel instance
+            cache: Optional ResultCache; identical runs are served from it
+            risk_manager: Optional RiskManager checking orders before they fill
+            feature_store: Optional FeatureStore shared across runs
         """
         self.data = data
         self.timeline = timeline
         self.portfolio = portfolio
         self.execution_model = execution_model
+        self.cache = cache
         self.clock = Clock(timeline)  # Time management
-        self.context = Context(self.data, self.portfolio, self.execution_model)  # Strategy interface
+        self.risk_manager = risk_manager
+        if risk_manager is not None:
+            risk_manager.sync(portfolio)
+        self.context = Context(self.data, self.portfolio, self.execution_model, risk_manager,
+                               feature_store)  # Strategy interface
         
         # Handle single symbol data (from yfinance)
         if isinstance(data, pd.DataFrame):
@@ -35,22 +44,59 @@ class Engine:
         else:
             self.symbols = list(data.keys())
     
-    def run(self, strategy):
+    def reset(self, portfolio):
+        """
+        Swap in a fresh portfolio so the engine can be run again.
+        Lets many runs (e.g. short event windows) share one engine and its prepared data.
+        
+        Args:
+            portfolio: Portfolio instance for the next run
+        """
+        self.portfolio = portfolio
+        if self.risk_manager is not None:
+            self.risk_manager.sync(portfolio)
+        self.context.set_portfolio(portfolio)
+    
+    def run(self, strategy, start=None, end=None):
         """
         Run the backtest with the given strategy.
         
         Args:
             strategy: Strategy instance with on_bar method
+            start: Optional first timestamp to run from (inclusive)
+            end: Optional last timestamp to run to (inclusive)
         """
-        print(f"🚀 Starting backtest for {len(self.timeline)} time periods...")
+        self.clock.run(start, end)
+        
+        cache_key = None
+        if self.cache is not None:
+            # Key on the strategy's parameters before on_bar starts mutating its state
+            risk_limits = self.risk_manager.limits if self.risk_manager is not None else None
+            cache_key = self.cache.make_key(self.data, self.clock.window(), strategy,
+                                            self.execution_model, self.portfolio.cash, risk_limits,
+                                            self.portfolio.lots.method)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                risk_events = self.cache.restore(cached, self.portfolio, strategy)
+                # Position vectors and rejection log must match those of a real run
+                if self.risk_manager is not None:
+                    self.risk_manager.sync(self.portfolio)
+                    self.risk_manager.events.extend(risk_events)
+                self.context.set_portfolio(self.portfolio)
+                print(f"♻️  Loaded cached backtest result ({len(self.clock)} time periods)")
+                return
+        
+        print(f"🚀 Starting backtest for {len(self.clock)} time periods...")
+        num_events = len(self.risk_manager.events) if self.risk_manager is not None else 0
         
         for ts in self.clock:  # Iterate through each timestamp
-            # Update portfolio mark-to-market
-            self.portfolio.mark_to_market(ts, self.data)
-            
             # Update context with current timestamp
             self.context.current_timestamp = ts
             
+            # Update portfolio mark-to-market
+            self.portfolio.mark_to_market_prices(ts, self.context.position_prices())
+            self.context.mark_risk()
+            
             # Execute strategy logic
             strategy.on_bar(self.context)
             
@@ -58,6 +104,11 @@ class Engine:
             self._process_orders(ts)
         
         print(f"✅ Backtest completed!")
+        
+        if cache_key is not None:
+            risk_events = self.risk_manager.events[num_events:] if self.risk_manager is not None else None
+            if not self.cache.put(cache_key, self.portfolio, risk_events, strategy):
+                print(f"⚠️  Strategy state cannot be pickled, result not cached")
     
     def _process_orders(self, timestamp):
         """
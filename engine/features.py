@@ -0,0 +1,174 @@
+# backtestr/engine/features.py
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+
+def sma(close, window):
+    """
+    Simple moving average over the last `window` bars (NaN until enough history).
+
+    Args:
+        close: Close price array
+        window: Number of bars to average
+    """
+    out = np.full(len(close), np.nan)
+    if window <= len(close):
+        csum = np.cumsum(np.r_[0.0, close])
+        out[window - 1:] = (csum[window:] - csum[:-window]) / window
+    return out
+
+
+def momentum(close, lookback):
+    """
+    Return over the last `lookback` bars (NaN until enough history).
+
+    Args:
+        close: Close price array
+        lookback: Number of bars to look back
+    """
+    out = np.full(len(close), np.nan)
+    if lookback < len(close):
+        out[lookback:] = close[lookback:] / close[:-lookback] - 1
+    return out
+
+
+class FeatureStore:
+    """
+    Shared, memoized store of derived series (moving averages, momentum, ...).
+    Each series is computed once per (symbol, data version, indicator, parameters)
+    and kept in a memory-bounded LRU; evicted series can spill to memory-mapped files.
+    Indicators see only the bars a symbol actually has, so window lengths count its
+    own bars and gaps in the aligned universe do not leak NaN into later values.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, spill_dir=None):
+        """
+        Initialize the feature store.
+
+        Args:
+            max_bytes: Memory budget for cached series
+            spill_dir: Optional directory where evicted series are kept as .npy files
+        """
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        if spill_dir is not None:
+            os.makedirs(spill_dir, exist_ok=True)
+
+        self.indicators = {"sma": sma, "momentum": momentum}
+        self._cache = OrderedDict()  # key -> read-only array, least recently used first
+        self._spilled = {}  # key -> read-only memory map of the spilled .npy file
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.spill_hits = 0
+        self.evictions = 0
+
+    def register(self, name, func):
+        """
+        Add an indicator.
+
+        Args:
+            name: Indicator name used in lookups
+            func: func(close, **params) returning an array aligned with close;
+                  close only holds the symbol's own bars, without gaps
+        """
+        self.indicators[name] = func
+
+    def get(self, symbol, data_version, close, name, **params):
+        """
+        Get an indicator series, computing it on first use.
+
+        Args:
+            symbol: Symbol the series belongs to
+            data_version: Fingerprint of the input data (see data_version)
+            close: Close price array (NaN where the symbol has no bar), only read on a miss
+            name: Indicator name
+            **params: Indicator parameters
+
+        Returns:
+            np.ndarray: Read-only series aligned with close
+        """
+        key = (symbol, data_version, name, tuple(sorted(params.items())))
+
+        series = self._cache.get(key)
+        if series is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return series
+
+        series = self._spilled.get(key)
+        if series is not None:
+            self.spill_hits += 1
+            return series
+
+        self.misses += 1
+        close = np.asarray(close, dtype=float)
+        bars = ~np.isnan(close)
+        if bars.all():
+            series = np.asarray(self.indicators[name](close, **params), dtype=float)
+        else:
+            # Compute over the symbol's own bars so a missing bar in the aligned
+            # universe does not propagate NaN, then scatter back (NaN on missing bars)
+            series = np.full(len(close), np.nan)
+            series[bars] = self.indicators[name](close[bars], **params)
+        series.flags.writeable = False
+        self._cache[key] = series
+        self.bytes += series.nbytes
+        self._evict()
+        return series
+
+    def stats(self):
+        """
+        Get cache statistics for sizing the store.
+
+        Returns:
+            dict: Hits, misses, spill hits, evictions, entries and bytes held
+        """
+        lookups = self.hits + self.spill_hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "spill_hits": self.spill_hits,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.spill_hits) / lookups if lookups else 0,
+            "entries": len(self._cache),
+            "spilled_entries": len(self._spilled),
+            "bytes": self.bytes,
+        }
+
+    def clear(self):
+        """Drop every cached series, including spilled files."""
+        for series in self._spilled.values():
+            if os.path.exists(series.filename):
+                os.remove(series.filename)
+        self._cache.clear()
+        self._spilled.clear()
+        self.bytes = 0
+
+    def _evict(self):
+        """Evict least recently used series until the store fits in max_bytes."""
+        while self.bytes > self.max_bytes and len(self._cache) > 1:
+            key, series = self._cache.popitem(last=False)
+            self.bytes -= series.nbytes
+            self.evictions += 1
+
+            if self.spill_dir is not None:
+                path = os.path.join(self.spill_dir, hashlib.sha1(repr(key).encode()).hexdigest() + ".npy")
+                np.save(path, series)
+                self._spilled[key] = np.load(path, mmap_mode="r")
+
+
+def data_version(close):
+    """
+    Fingerprint a price series so cached features are invalidated when it changes.
+
+    Args:
+        close: Close price array
+
+    Returns:
+        str: Hex digest of the series contents
+    """
+    return hashlib.sha1(np.ascontiguousarray(close, dtype=float).tobytes()).hexdigest()
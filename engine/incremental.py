@@ -0,0 +1,210 @@
+# backtestr/engine/incremental.py
+import os
+import pickle
+
+from engine.cache import config_fingerprint, dataset_fingerprint
+from engine.engine import Engine
+from portfolio.portfolio import Portfolio
+
+HISTORIES = ("equity_history", "trade_history", "daily_pnl")  # Append-only Portfolio lists
+
+
+class IncrementalRunner:
+    """
+    Extends a finished backtest when new bars are appended to the dataset.
+    Persists the portfolio and strategy state needed to resume, together with a
+    data watermark, and on the next run only processes bars after the watermark.
+    The append-only histories (equity curve, trades, daily P&L) live in separate
+    log files that each refresh only appends to, so saving the resume state costs
+    the same however long the history grows.
+    Falls back to a full run when history up to the watermark has changed.
+    """
+
+    def __init__(self, state_path, verify_history=True):
+        """
+        Initialize the runner.
+
+        Args:
+            state_path: File where run state is persisted between refreshes;
+                        history logs are kept next to it as <state_path>.<history>
+            verify_history: Hash history up to the watermark to detect edits.
+                            Disable only for trusted append-only data.
+        """
+        self.state_path = state_path
+        self.verify_history = verify_history
+
+    def run(self, data, timeline, strategy, initial_cash, execution_model, load_history=False):
+        """
+        Bring the backtest up to date with the dataset.
+
+        Args:
+            data: dict {symbol: DataFrame} or DataFrame for single symbol
+            timeline: list of timestamps to iterate through
+            strategy: Fresh strategy instance, used for a full run and to detect parameter changes
+            initial_cash: Starting cash for a full run
+            execution_model: ExecutionModel instance
+            load_history: Read the full histories back into a resumed portfolio (O(history)).
+                          By default it only holds the entries added by this refresh, after
+                          the initial equity seed, so a refresh costs O(new bars); history()
+                          returns the full record.
+
+        Returns:
+            tuple: (portfolio, strategy) after processing every bar in the timeline
+        """
+        config_key = config_fingerprint(strategy, execution_model, initial_cash)
+        state = self._load()
+
+        engine = None
+        if state is not None and state["config_key"] == config_key:
+            engine = Engine(data, timeline, self._resume_portfolio(state, load_history), execution_model)
+            if not self._history_matches(engine, state):
+                print(f"⚠️  History before {state['watermark']} changed, running full backtest")
+                engine = None
+            else:
+                strategy = state["strategy"]
+
+        if engine is None:
+            state = None
+            engine = Engine(data, timeline, Portfolio(initial_cash), execution_model)
+            persisted = dict.fromkeys(HISTORIES, 0)
+            engine.run(strategy)
+        else:
+            # Entries already in the logs; everything after them is new
+            persisted = {name: len(getattr(engine.portfolio, name)) for name in HISTORIES}
+
+            # Resume from the first bar after the watermark
+            clock = engine.clock
+            start = clock.position_of(state["watermark"], side="right")
+            if start < len(clock.timeline):
+                engine.run(strategy, start=clock.index[start])
+            else:
+                print(f"✅ Backtest already up to date")
+
+        self._save(engine, strategy, config_key, state, persisted)
+        return engine.portfolio, strategy
+
+    def history(self):
+        """
+        Read the persisted histories.
+
+        Returns:
+            dict: {"equity_history", "trade_history", "daily_pnl"} lists, empty without saved state
+        """
+        state = self._load()
+        if state is None:
+            return {name: [] for name in HISTORIES}
+        return {name: self._read_log(name, state["log_sizes"][name]) for name in HISTORIES}
+
+    def _resume_portfolio(self, state, load_history):
+        """Rebuild the portfolio saved in a state, with full or only seed histories."""
+        portfolio = Portfolio(state["initial_cash"])
+        for name, value in state["portfolio"].items():
+            setattr(portfolio, name, value)
+
+        if load_history:
+            for name in HISTORIES:
+                setattr(portfolio, name, self._read_log(name, state["log_sizes"][name]))
+        else:
+            # Keep the initial seed for total returns and the last mark for the next daily P&L
+            portfolio.equity_history = list(state["equity_ends"])
+            portfolio.trade_history = []
+            portfolio.daily_pnl = []
+        return portfolio
+
+    def _history_matches(self, engine, state):
+        """Check that bars up to the watermark are exactly those already processed."""
+        clock = engine.clock
+        processed = clock.position_of(state["watermark"], side="right")
+        if processed != state["num_bars"] or clock.index[processed - 1] != state["watermark"]:
+            return False
+        if not self.verify_history:
+            return True
+        return _history_fingerprint(engine.data, state["watermark"]) == state["history_fingerprint"]
+
+    def _load(self):
+        """Load persisted state, or None if there is none (or it predates the history logs)."""
+        try:
+            with open(self.state_path, "rb") as f:
+                state = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+        return state if "log_sizes" in state else None
+
+    def _save(self, engine, strategy, config_key, state, persisted):
+        """
+        Persist the state needed to resume after the last processed bar.
+        New history entries are appended to the logs first; the state file that
+        records the logs' valid sizes is then replaced atomically, so an interrupted
+        refresh leaves the previous state and at most a log tail that is cut off next time.
+        """
+        clock = engine.clock
+        if len(clock.timeline) == 0:
+            return
+
+        portfolio = engine.portfolio
+        log_sizes = {}
+        for name in HISTORIES:
+            size = state["log_sizes"][name] if state is not None else 0
+            log_sizes[name] = self._append_log(name, size, getattr(portfolio, name)[persisted[name]:])
+
+        equity = portfolio.equity_history
+        watermark = clock.index[-1]
+        state = {
+            "config_key": config_key,
+            "initial_cash": equity[0][1],
+            "portfolio": {
+                name: value for name, value in vars(portfolio).items() if name not in HISTORIES
+            },
+            "equity_ends": [equity[0], equity[-1]] if len(equity) > 1 else [equity[0]],
+            "log_sizes": log_sizes,
+            "strategy": strategy,
+            "watermark": watermark,
+            "num_bars": len(clock.timeline),
+            "history_fingerprint": _history_fingerprint(engine.data, watermark) if self.verify_history else None,
+        }
+
+        # Write atomically so an interrupted refresh never leaves a corrupt state file
+        tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.state_path)
+
+    def _log_path(self, name):
+        """Get the log file of a history."""
+        return f"{self.state_path}.{name}"
+
+    def _append_log(self, name, size, entries):
+        """
+        Append entries to a history log as one pickled chunk.
+
+        Args:
+            name: History name
+            size: Valid size of the log in bytes; anything after it is discarded
+            entries: New entries
+
+        Returns:
+            int: New valid size of the log
+        """
+        path = self._log_path(name)
+        with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+            f.truncate(size)
+            f.seek(size)
+            if entries:
+                pickle.dump(list(entries), f, protocol=pickle.HIGHEST_PROTOCOL)
+            return f.tell()
+
+    def _read_log(self, name, size):
+        """Read every chunk of a history log up to its valid size."""
+        entries = []
+        try:
+            with open(self._log_path(name), "rb") as f:
+                while f.tell() < size:
+                    entries.extend(pickle.load(f))
+        except FileNotFoundError:
+            pass
+        return entries
+
+
+def _history_fingerprint(data, watermark):
+    """Hash every bar at or before the watermark."""
+    return dataset_fingerprint({symbol: df[df["timestamp"] <= watermark] for symbol, df in data.items()})
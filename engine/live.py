@@ -0,0 +1,342 @@
+# backtestr/engine/live.py
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from engine.context import Context
+from engine.features import FeatureStore
+
+
+@dataclass
+class Bar:
+    """
+    A single OHLCV bar pushed by a live feed.
+    """
+    symbol: str              # Symbol the bar belongs to
+    timestamp: pd.Timestamp  # Bar timestamp
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+
+
+class LiveContext(Context):
+    """
+    Context for streaming mode.
+    Prices come from the latest bar per symbol instead of DataFrame lookups.
+    The universe grows as symbols first appear on the feed, so the vector API
+    (symbols, prices, positions, order_target_*) works on the symbols seen so far.
+    Recent closes are kept in a ring buffer per symbol for returns() and feature(),
+    sized to the longest lookback requested so memory stays bounded.
+    """
+
+    def __init__(self, portfolio, execution_model, history=0):
+        """
+        Initialize the live context.
+
+        Args:
+            portfolio: Portfolio instance
+            execution_model: ExecutionModel instance
+            history: Closes to keep per symbol from the start; the buffer also grows
+                     to the longest lookback requested, with NaN history until it fills
+        """
+        self.last_prices = {}  # symbol -> latest close
+        self._prices = np.zeros(0)  # Latest close per universe symbol
+        self._history = np.full((history, 0), np.nan)  # Ring of recent closes, one column per symbol
+        self._bars = np.zeros(0, dtype=np.int64)  # Closes received per symbol
+        super().__init__({}, portfolio, execution_model)
+
+    def update_price(self, symbol, price):
+        """
+        Record the latest close for a symbol, adding it to the universe on first sight.
+
+        Args:
+            symbol: Symbol the bar belongs to
+            price: Bar close
+        """
+        col = self._column.get(symbol)
+        if col is None:
+            col = self._column[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+            pos = self.portfolio.positions.get(symbol)
+            self._qty = np.append(self._qty, pos["qty"] if pos else 0)
+            self._prices = np.append(self._prices, np.nan)
+            self._history = np.append(self._history, np.full((len(self._history), 1), np.nan), axis=1)
+            self._bars = np.append(self._bars, 0)
+        self.last_prices[symbol] = price
+        self._prices[col] = price
+
+        size = len(self._history)
+        if size:
+            self._history[self._bars[col] % size, col] = price
+        self._bars[col] += 1
+
+    def price(self, symbol):
+        """
+        Get the latest streamed price for a symbol.
+
+        Args:
+            symbol: Symbol to get price for
+
+        Returns:
+            float: Latest close price, or None before the first bar
+        """
+        return self.last_prices.get(symbol)
+
+    def prices(self):
+        """
+        Get the latest streamed prices for the universe.
+
+        Returns:
+            np.ndarray: Read-only prices aligned with ctx.symbols
+        """
+        view = self._prices.view()
+        view.flags.writeable = False
+        return view
+
+    def returns(self, lookback=1):
+        """
+        Get trailing returns for the universe over each symbol's own bars.
+
+        Args:
+            lookback: Number of bars to look back
+
+        Returns:
+            np.ndarray: Returns aligned with ctx.symbols (NaN until the buffer holds enough history)
+        """
+        self._keep_history(lookback + 1)
+        bars = self._bars
+        past = self._history[(bars - 1 - lookback) % len(self._history), np.arange(len(bars))]
+        return np.where(bars > lookback, self._prices / past - 1, np.nan)
+
+    def feature(self, symbol, name, **params):
+        """
+        Get a derived series (e.g. "sma", "momentum") over a symbol's buffered closes.
+        The buffer grows to the largest integer parameter plus one bar, enough for
+        window/lookback indicators; recursive indicators only see the buffered bars.
+
+        Args:
+            symbol: Symbol to get the series for
+            name: Indicator name registered in the feature store
+            **params: Indicator parameters, e.g. window=20
+
+        Returns:
+            np.ndarray: Read-only series over the buffered bars ending at the latest one,
+                        or None before the symbol's first bar
+        """
+        col = self._column.get(symbol)
+        if col is None:
+            return None
+
+        if self.feature_store is None:
+            self.feature_store = FeatureStore()
+        func = self.feature_store.indicators[name]
+
+        lookbacks = [value for value in params.values()
+                     if isinstance(value, (int, np.integer)) and not isinstance(value, bool)]
+        self._keep_history(max(lookbacks, default=0) + 1)
+
+        # Oldest to newest; bars lost before the buffer last grew are NaN and dropped
+        size = len(self._history)
+        bars = int(self._bars[col])
+        close = self._history[np.arange(bars - min(bars, size), bars) % size, col]
+        close = close[~np.isnan(close)]
+
+        series = np.asarray(func(close, **params), dtype=float)
+        series.flags.writeable = False
+        return series
+
+    def _keep_history(self, size):
+        """Grow the close buffer to hold at least `size` bars per symbol, keeping what it has."""
+        old = self._history
+        if size <= len(old):
+            return
+
+        history = np.full((size, len(self.symbols)), np.nan)
+        if len(old):
+            # Move each buffered bar to its slot in the larger ring
+            bar = self._bars - np.arange(1, len(old) + 1)[:, None]
+            col = np.broadcast_to(np.arange(len(self.symbols)), bar.shape)
+            kept = bar >= 0
+            history[bar[kept] % size, col[kept]] = old[bar[kept] % len(old), col[kept]]
+        self._history = history
+
+
+class ReplayFeed:
+    """
+    Replays a finished DataFrame as a live bar stream.
+    """
+
+    def __init__(self, data, symbol, speed=None):
+        """
+        Initialize the replay feed.
+
+        Args:
+            data: DataFrame with timestamp and OHLCV columns
+            symbol: Symbol to stamp on every bar
+            speed: Replay speed multiple of real time (None = as fast as possible)
+        """
+        self.symbol = symbol
+        self.speed = speed
+
+        # Pull columns out once so replay never touches the DataFrame again
+        self.timestamps = data["timestamp"].tolist()
+        self.columns = [data[col].to_numpy(dtype=float).tolist()
+                        for col in ("open", "high", "low", "close", "volume")]
+
+    async def __aiter__(self):
+        """Yield bars, pacing them by their timestamp gaps when speed is set."""
+        opens, highs, lows, closes, volumes = self.columns
+        prev_ts = None
+        for i, ts in enumerate(self.timestamps):
+            if self.speed and prev_ts is not None:
+                await asyncio.sleep((ts - prev_ts).total_seconds() / self.speed)
+            prev_ts = ts
+            yield Bar(self.symbol, ts, opens[i], highs[i], lows[i], closes[i], volumes[i])
+
+
+class SocketFeed:
+    """
+    Reads bars from a socket as newline-delimited JSON.
+    Stand-in for a live market data connection.
+    """
+
+    def __init__(self, host="localhost", port=9999):
+        """
+        Initialize the socket feed.
+
+        Args:
+            host: Host serving bars
+            port: Port serving bars
+        """
+        self.host = host
+        self.port = port
+
+    async def __aiter__(self):
+        """Yield bars until the server closes the connection."""
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                msg = json.loads(line)
+                yield Bar(msg["symbol"], pd.Timestamp(msg["timestamp"]), msg["open"],
+                          msg["high"], msg["low"], msg["close"], msg["volume"])
+        finally:
+            writer.close()
+
+
+async def serve_bars(data, symbol, host="localhost", port=9999, speed=None):
+    """
+    Serve a DataFrame as a newline-delimited JSON bar stream.
+    Every connecting client receives the full replay.
+
+    Args:
+        data: DataFrame with timestamp and OHLCV columns
+        symbol: Symbol to stamp on every bar
+        host: Host to bind
+        port: Port to bind (0 picks a free port)
+        speed: Replay speed multiple of real time (None = as fast as possible)
+
+    Returns:
+        asyncio.Server: Running server; its sockets expose the bound port
+    """
+    async def handle(reader, writer):
+        async for bar in ReplayFeed(data, symbol, speed):
+            writer.write((json.dumps({
+                "symbol": bar.symbol,
+                "timestamp": bar.timestamp.isoformat(),
+                "open": bar.open,
+                "high": bar.high,
+                "low": bar.low,
+                "close": bar.close,
+                "volume": bar.volume,
+            }) + "\n").encode())
+            await writer.drain()
+        writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+class LiveEngine:
+    """
+    Streaming/paper-trading engine.
+    Drives the same on_bar(ctx) strategies from bars pushed by a feed,
+    updating portfolio and context incrementally.
+    """
+
+    def __init__(self, portfolio, execution_model, history=0):
+        """
+        Initialize the live engine.
+
+        Args:
+            portfolio: Portfolio instance
+            execution_model: ExecutionModel instance
+            history: Closes to keep per symbol from the start (see LiveContext)
+        """
+        self.portfolio = portfolio
+        self.execution_model = execution_model
+        self.context = LiveContext(self.portfolio, self.execution_model, history)  # Strategy interface
+        self.latencies_ns = []  # Bar arrival -> order decision, per bar
+
+    async def run(self, strategy, feed):
+        """
+        Run the strategy against a live feed until it ends.
+
+        Args:
+            strategy: Strategy instance with on_bar method
+            feed: Async iterable of Bar objects (ReplayFeed, SocketFeed, ...)
+        """
+        print(f"📡 Starting live session...")
+
+        ctx = self.context
+        last_prices = ctx.last_prices
+        latencies = self.latencies_ns
+        async for bar in feed:
+            arrived = time.perf_counter_ns()
+
+            ctx.update_price(bar.symbol, bar.close)
+            self.portfolio.mark_to_market_prices(bar.timestamp, last_prices)
+            ctx.current_timestamp = bar.timestamp
+
+            # Execute strategy logic
+            strategy.on_bar(ctx)
+
+            latencies.append(time.perf_counter_ns() - arrived)
+
+        print(f"✅ Live session ended after {len(latencies)} bars")
+
+    def run_sync(self, strategy, feed):
+        """
+        Run the live session to completion from synchronous code.
+
+        Args:
+            strategy: Strategy instance with on_bar method
+            feed: Async iterable of Bar objects
+        """
+        asyncio.run(self.run(strategy, feed))
+
+    def latency_stats(self):
+        """
+        Summarize bar-to-decision latency.
+
+        Returns:
+            dict: Count plus mean/p50/p99/max latency in microseconds
+        """
+        if not self.latencies_ns:
+            return {"bars": 0}
+
+        us = np.asarray(self.latencies_ns, dtype=float) / 1000
+        return {
+            "bars": len(us),
+            "mean_us": float(us.mean()),
+            "p50_us": float(np.percentile(us, 50)),
+            "p99_us": float(np.percentile(us, 99)),
+            "max_us": float(us.max()),
+        }
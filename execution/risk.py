@@ -0,0 +1,304 @@
+# backtestr/execution/risk.py
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class RiskLimits:
+    """
+    Pre-trade limits enforced by the RiskManager.
+    Any limit left as None is not checked.
+    """
+    max_position_qty: float = None     # Max absolute shares per symbol
+    max_position_value: float = None   # Max absolute notional per symbol
+    max_concentration: float = None    # Max absolute notional per symbol as a fraction of equity
+    max_gross_exposure: float = None   # Max sum of absolute notionals
+    max_net_exposure: float = None     # Max absolute sum of signed notionals
+    max_short_value: float = None      # Max total short notional (margin limit)
+    min_cash: float = None             # Cash may not fall below this (0 = no borrowing)
+
+
+@dataclass
+class RiskEvent:
+    """
+    Structured record of an order rejected by the RiskManager.
+    """
+    timestamp: object  # Time of the check
+    symbol: str        # Symbol of the rejected order
+    qty: float         # Order quantity (positive = buy, negative = sell)
+    price: float       # Price the order was checked at
+    reason: str        # Name of the RiskLimits field that was breached
+    limit: float       # Limit value
+    value: float       # Value the order would have produced
+
+
+class RiskManager:
+    """
+    Validates batches of orders against per-symbol and portfolio-level limits.
+    Keeps its own position and price vectors so whole batches are checked with
+    array operations instead of per-order Python logic.
+    """
+
+    def __init__(self, limits, symbols=None):
+        """
+        Initialize the risk manager.
+
+        Args:
+            limits: RiskLimits instance
+            symbols: Optional list of symbols to pre-register, in vector order
+        """
+        self.limits = limits
+        self.symbols = []
+        self.symbol_index = {}  # symbol -> position in the vectors
+        self.positions = np.zeros(0)  # Signed quantity per symbol
+        self.last_prices = np.zeros(0)  # Latest known price per symbol
+        self.events = []  # Every RiskEvent produced so far
+
+        if symbols is not None:
+            self.index_of(symbols)
+
+    def index_of(self, symbols):
+        """
+        Map symbols to vector positions, registering unseen ones.
+
+        Args:
+            symbols: Iterable of symbols
+
+        Returns:
+            np.ndarray: Integer positions into the position vector
+        """
+        index = self.symbol_index
+        new = [s for s in dict.fromkeys(symbols) if s not in index]
+        if new:
+            for symbol in new:
+                index[symbol] = len(self.symbols)
+                self.symbols.append(symbol)
+            self.positions = np.concatenate([self.positions, np.zeros(len(new))])
+            self.last_prices = np.concatenate([self.last_prices, np.zeros(len(new))])
+        return np.fromiter((index[s] for s in symbols), dtype=np.intp)
+
+    def sync(self, portfolio):
+        """
+        Load current holdings from a portfolio.
+
+        Args:
+            portfolio: Portfolio instance
+        """
+        self.positions[:] = 0
+        if portfolio.positions:
+            idx = self.index_of(list(portfolio.positions))
+            self.positions[idx] = [pos["qty"] for pos in portfolio.positions.values()]
+
+    def mark(self, idx, prices):
+        """
+        Update the price vector with current marks, e.g. once per bar.
+        Exposure checks value existing positions at these prices.
+
+        Args:
+            idx: Vector positions of the priced symbols
+            prices: Current prices (NaN = no bar, keeps the previous mark)
+        """
+        prices = np.asarray(prices, dtype=float)
+        priced = ~np.isnan(prices)
+        self.last_prices[np.asarray(idx, dtype=np.intp)[priced]] = prices[priced]
+
+    def record_fill(self, symbol, qty, price):
+        """
+        Update the position vector after a fill.
+
+        Args:
+            symbol: Symbol traded
+            qty: Filled quantity (positive for buy, negative for sell)
+            price: Fill price
+        """
+        i = self.index_of([symbol])[0]
+        self.positions[i] += qty
+        self.last_prices[i] = price
+
+    def record_fills(self, idx, qtys, prices):
+        """
+        Update the position vector after a batch of fills.
+
+        Args:
+            idx: Vector positions of the filled symbols
+            qtys: Filled quantities
+            prices: Fill prices
+        """
+        np.add.at(self.positions, idx, qtys)
+        self.last_prices[idx] = prices
+
+    def check(self, symbols, qtys, prices, cash, timestamp=None):
+        """
+        Check a batch of orders.
+
+        Args:
+            symbols: Symbols of the orders
+            qtys: Order quantities (positive for buy, negative for sell)
+            prices: Prices to evaluate the orders at
+            cash: Current portfolio cash
+            timestamp: Time of the check, recorded on rejections
+
+        Returns:
+            tuple: (accepted mask, list of RiskEvent for rejected orders)
+        """
+        return self.check_indexed(self.index_of(symbols), qtys, prices, cash, timestamp)
+
+    def check_indexed(self, idx, qtys, prices, cash, timestamp=None):
+        """
+        Check a batch of orders given as vector positions.
+
+        Orders are evaluated in submission order, each seeing the positions
+        and portfolio totals produced by the batch's earlier accepted orders;
+        rejected orders count towards nothing. Orders that reduce the breached
+        exposure are always accepted.
+
+        One vectorized pass evaluates every order as if all were accepted; when
+        no limit binds that is the answer. Otherwise orders are resolved in
+        submission order from the first breach, re-evaluating only those whose
+        outcome can change: flagged orders, later orders on a symbol with a
+        rejected order, and every order while a rejection has left a running
+        total less favourable than in the vectorized pass. That walk is a scalar
+        loop (a few microseconds per re-evaluated order), since whether an order
+        fits depends on which earlier ones were rejected.
+
+        Args:
+            idx: Vector positions of the order symbols (see index_of)
+            qtys: Order quantities
+            prices: Prices to evaluate the orders at
+            cash: Current portfolio cash
+            timestamp: Time of the check, recorded on rejections
+
+        Returns:
+            tuple: (accepted mask, list of RiskEvent for rejected orders)
+        """
+        limits = self.limits
+        idx = np.asarray(idx, dtype=np.intp)
+        qtys = np.asarray(qtys, dtype=float)
+        prices = np.asarray(prices, dtype=float)
+        n = len(idx)
+        accepted = np.ones(n, dtype=bool)
+        if n == 0:
+            return accepted, []
+
+        # Book before the batch, marked at the freshest prices
+        self.last_prices[idx] = prices
+        book_values = self.positions * self.last_prices
+        gross0 = np.abs(book_values).sum()
+        net0 = book_values.sum()
+        short0 = -book_values[book_values < 0].sum()
+        equity = cash + net0
+
+        # Position each order starts from if every earlier order on its symbol fills
+        order = np.argsort(idx, kind="stable")
+        excl = np.cumsum(qtys[order]) - qtys[order]
+        sorted_idx = idx[order]
+        group_start = np.r_[True, sorted_idx[1:] != sorted_idx[:-1]]
+        starts = np.maximum.accumulate(np.where(group_start, np.arange(n), 0))
+        prior = np.empty(n)
+        prior[order] = excl - excl[starts]
+        pre = self.positions[idx] + prior
+        post = pre + qtys
+
+        # Per-symbol limits, for orders that grow the position
+        size = np.abs(post)
+        flagged = np.zeros(n, dtype=bool)
+        if limits.max_position_qty is not None:
+            flagged |= size > limits.max_position_qty
+        if limits.max_position_value is not None:
+            flagged |= size * prices > limits.max_position_value
+        if limits.max_concentration is not None:
+            flagged |= size * prices / equity > limits.max_concentration if equity > 0 else True
+        flagged &= size > np.abs(pre)
+
+        # Portfolio-level limits on running totals (inclusive of each order)
+        notional = qtys * prices
+        d_gross = (size - np.abs(pre)) * prices
+        d_short = (np.maximum(-post, 0) - np.maximum(-pre, 0)) * prices
+        gross = gross0 + np.cumsum(d_gross)
+        net = net0 + np.cumsum(notional)
+        short = short0 + np.cumsum(d_short)
+        cash_after = cash - np.cumsum(notional)
+        if limits.max_gross_exposure is not None:
+            flagged |= (d_gross > 0) & (gross > limits.max_gross_exposure)
+        if limits.max_net_exposure is not None:
+            flagged |= (np.abs(net) > np.abs(net - notional)) & (np.abs(net) > limits.max_net_exposure)
+        if limits.max_short_value is not None:
+            flagged |= (d_short > 0) & (short > limits.max_short_value)
+        if limits.min_cash is not None:
+            flagged |= (notional > 0) & (cash_after < limits.min_cash)
+
+        if not flagged.any():
+            return accepted, []
+
+        # Resolve in order from the first breach. The shifts are how far the running
+        # totals have moved from the vectorized pass because of rejections so far;
+        # while none is unfavourable, an unflagged order on an untouched symbol
+        # behaves exactly as in that pass and is skipped.
+        max_qty, max_value, max_conc = limits.max_position_qty, limits.max_position_value, limits.max_concentration
+        max_gross, max_net, max_short, min_cash = (limits.max_gross_exposure, limits.max_net_exposure,
+                                                   limits.max_short_value, limits.min_cash)
+        shift_gross = shift_net = shift_short = shift_cash = 0.0
+        safe = True
+        removed = {}  # Vector position -> quantity of rejected orders on that symbol so far
+        rejections = []  # RiskEvent per rejected order, in submission order
+        symbols = self.symbols
+
+        first = int(np.argmax(flagged))
+        tail = slice(first, n)
+        for i, symbol, qty, price, pre_i, is_flagged, base_dg, base_ds, g, nt, sh, ca in zip(
+                range(first, n), idx[tail].tolist(), qtys[tail].tolist(), prices[tail].tolist(),
+                pre[tail].tolist(), flagged[tail].tolist(), d_gross[tail].tolist(), d_short[tail].tolist(),
+                (gross - d_gross)[tail].tolist(), (net - notional)[tail].tolist(),
+                (short - d_short)[tail].tolist(), (cash_after + notional)[tail].tolist()):
+            if safe and not is_flagged and symbol not in removed:
+                continue
+
+            post_i = pre_i + qty
+            dg_i, ds_i = base_dg, base_ds
+            if symbol in removed:
+                # Start position moved: recompute this order's exposure changes
+                pre_i -= removed[symbol]
+                post_i = pre_i + qty
+                dg_i = (abs(post_i) - abs(pre_i)) * price
+                ds_i = ((-post_i if post_i < 0 else 0.0) - (-pre_i if pre_i < 0 else 0.0)) * price
+            size_i = abs(post_i)
+            cost = qty * price
+
+            reason = None
+            if size_i > abs(pre_i):
+                if max_qty is not None and size_i > max_qty:
+                    reason, limit, value = "max_position_qty", max_qty, size_i
+                elif max_value is not None and size_i * price > max_value:
+                    reason, limit, value = "max_position_value", max_value, size_i * price
+                elif max_conc is not None and (equity <= 0 or size_i * price / equity > max_conc):
+                    reason, limit, value = "max_concentration", max_conc, (
+                        size_i * price / equity if equity > 0 else float("inf"))
+            if reason is None and max_gross is not None and dg_i > 0 and g + shift_gross + dg_i > max_gross:
+                reason, limit, value = "max_gross_exposure", max_gross, g + shift_gross + dg_i
+            if reason is None and max_net is not None:
+                old = nt + shift_net
+                if abs(old + cost) > abs(old) and abs(old + cost) > max_net:
+                    reason, limit, value = "max_net_exposure", max_net, abs(old + cost)
+            if reason is None and max_short is not None and ds_i > 0 and sh + shift_short + ds_i > max_short:
+                reason, limit, value = "max_short_value", max_short, sh + shift_short + ds_i
+            if reason is None and min_cash is not None and cost > 0 and ca + shift_cash - cost < min_cash:
+                reason, limit, value = "min_cash", min_cash, ca + shift_cash - cost
+
+            if reason is None:
+                # Filled, possibly from a different start position than the vectorized pass assumed
+                shift_gross += dg_i - base_dg
+                shift_short += ds_i - base_ds
+            else:
+                accepted[i] = False
+                rejections.append(RiskEvent(timestamp, symbols[symbol], qty, price, reason, float(limit), value))
+                removed[symbol] = removed.get(symbol, 0.0) + qty
+                shift_gross -= base_dg
+                shift_net -= cost
+                shift_short -= base_ds
+                shift_cash += cost
+            safe = ((max_gross is None or shift_gross <= 0) and (max_net is None or shift_net == 0)
+                    and (max_short is None or shift_short <= 0) and (min_cash is None or shift_cash >= 0))
+
+        self.events.extend(rejections)
+        return accepted, rejections
@@ -187,6 +187,8 @@ def display_results(portfolio, symbol, start_date, end_date):
     print(f"💰 Final Equity: ${final_equity:,.2f}")
     print(f"📈 Total Return: ${total_return:,.2f} ({total_return_pct:+.2f}%)")
     print(f"💵 Current Cash: ${portfolio.cash:,.2f}")
+    print(f"✅ Realized P&L: ${portfolio.get_realized_pnl():,.2f}")
+    print(f"⏳ Unrealized P&L: ${portfolio.get_unrealized_pnl():,.2f}")
     
     # Position summary
     if portfolio.positions:
@@ -0,0 +1,164 @@
+# backtestr/portfolio/lots.py
+from collections import deque
+
+
+class SymbolLots:
+    """
+    Open lots and running P&L for one symbol.
+    """
+    __slots__ = ("lots", "qty", "cost", "realized")
+
+    def __init__(self):
+        self.lots = deque()  # [abs qty, price] per open lot, oldest first
+        self.qty = 0         # Signed open quantity
+        self.cost = 0.0      # Signed cost basis of the open lots
+        self.realized = 0.0  # Realized P&L to date
+
+
+class LotBook:
+    """
+    Tax-lot accounting with FIFO, LIFO or average-cost relief.
+    Lots sit in per-symbol deques; each lot is opened and closed once,
+    so every fill costs amortized O(1) however often a position scales in and out.
+    """
+
+    METHODS = ("fifo", "lifo", "average")
+
+    def __init__(self, method="fifo"):
+        """
+        Initialize the lot book.
+
+        Args:
+            method: Lot relief method: "fifo", "lifo" or "average"
+        """
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown lot method: {method} (expected one of {self.METHODS})")
+
+        self.method = method
+        self.symbols = {}  # symbol -> SymbolLots
+        self.realized = 0.0  # Realized P&L across all symbols
+
+    def fill(self, symbol, qty, price):
+        """
+        Apply a fill, closing opposite lots first and opening a new lot with any remainder.
+
+        Args:
+            symbol: Symbol traded
+            qty: Quantity (positive for buy, negative for sell)
+            price: Fill price
+
+        Returns:
+            float: P&L realized by this fill
+        """
+        book = self.symbols.get(symbol)
+        if book is None:
+            book = self.symbols[symbol] = SymbolLots()
+
+        realized = 0.0
+        if book.qty == 0 or (book.qty > 0) == (qty > 0):
+            self._open(book, qty, price)
+        else:
+            side = 1 if book.qty > 0 else -1
+            closing = min(abs(qty), abs(book.qty))
+            realized = self._close(book, side, closing, price)
+
+            # Anything beyond the open position flips it
+            remainder = abs(qty) - closing
+            if remainder > 0:
+                self._open(book, -side * remainder, price)
+
+        book.realized += realized
+        self.realized += realized
+        return realized
+
+    def position(self, symbol):
+        """
+        Get the open position for a symbol.
+
+        Args:
+            symbol: Symbol to look up
+
+        Returns:
+            tuple: (signed qty, average cost of the open lots)
+        """
+        book = self.symbols.get(symbol)
+        if book is None or book.qty == 0:
+            return 0, 0
+        if self.method == "average":
+            return book.qty, book.lots[0][1]
+        return book.qty, book.cost / book.qty
+
+    def cost_basis(self, symbol):
+        """Get the signed cost basis of a symbol's open lots."""
+        book = self.symbols.get(symbol)
+        return book.cost if book is not None else 0.0
+
+    def realized_pnl(self, symbol):
+        """Get realized P&L to date for a symbol."""
+        book = self.symbols.get(symbol)
+        return book.realized if book is not None else 0.0
+
+    def open_lots(self, symbol):
+        """
+        List a symbol's open lots.
+
+        Returns:
+            list: (signed qty, price) per lot, oldest first
+        """
+        book = self.symbols.get(symbol)
+        if book is None or book.qty == 0:
+            return []
+        side = 1 if book.qty > 0 else -1
+        return [(side * lot_qty, lot_price) for lot_qty, lot_price in book.lots]
+
+    def _open(self, book, qty, price):
+        """Add to a position in its own direction."""
+        if self.method == "average":
+            # One merged lot at the weighted average cost
+            if book.lots:
+                lot = book.lots[0]
+                new_qty = book.qty + qty
+                lot[1] = ((book.qty * lot[1]) + (qty * price)) / new_qty
+                lot[0] = abs(new_qty)
+            else:
+                book.lots.append([abs(qty), price])
+            book.qty += qty
+            book.cost = book.qty * book.lots[0][1]
+            return
+
+        book.lots.append([abs(qty), price])
+        book.qty += qty
+        book.cost += qty * price
+
+    def _close(self, book, side, closing, price):
+        """Relieve `closing` units from the open lots and return the realized P&L."""
+        lots = book.lots
+        realized = 0.0
+
+        if self.method == "average":
+            avg = lots[0][1]
+            realized = closing * (price - avg) * side
+            lots[0][0] -= closing
+            book.qty -= side * closing
+            book.cost = book.qty * avg
+        else:
+            # FIFO relieves the oldest lot, LIFO the newest
+            end = 0 if self.method == "fifo" else -1
+            pop = lots.popleft if self.method == "fifo" else lots.pop
+            remaining = closing
+            while remaining > 0:
+                lot = lots[end]
+                take = min(remaining, lot[0])
+                realized += take * (price - lot[1]) * side
+                book.cost -= side * take * lot[1]
+                lot[0] -= take
+                remaining -= take
+                if lot[0] == 0:
+                    pop()
+            book.qty -= side * closing
+
+        if book.qty == 0:
+            # Drop float residue once flat
+            lots.clear()
+            book.cost = 0.0
+        return realized
@@ -1,20 +1,27 @@
+import numpy as np
 import pandas as pd
 
+from portfolio.lots import LotBook
+
 class Portfolio:
     """
     Manages cash, positions, and tracks equity over time.
     Handles trade execution, position tracking, and performance calculation.
     """
     
-    def __init__(self, initial_cash):
+    def __init__(self, initial_cash, lot_method="average"):
         """
         Initialize portfolio with starting cash.
         
         Args:
             initial_cash: Starting cash amount
+            lot_method: Lot relief method: "average", "fifo" or "lifo"
         """
         self.cash = initial_cash
         self.positions = {}  # symbol -> {"qty": int, "avg": float}
+        self.lots = LotBook(lot_method)  # Tax lots behind each position
+        self.realized_pnl = 0.0  # Realized P&L to date
+        self.unrealized_pnl = 0.0  # Unrealized P&L as of the last mark
         self.equity_history = [(None, initial_cash)]  # (timestamp, equity)
         self.trade_history = []  # Track all trades
         self.daily_pnl = []  # Track daily P&L
@@ -40,38 +47,19 @@ class Portfolio:
         else:  # Sell
             self.cash += total_value
         
-        # Update position
-        if symbol not in self.positions:
-            self.positions[symbol] = {"qty": 0, "avg": 0}
-        
-        pos = self.positions[symbol]
-        old_qty = pos["qty"]
-        old_avg = pos["avg"]
-        
-        if qty > 0:  # Buy
-            if old_qty >= 0:  # Adding to long position
-                new_qty = old_qty + qty
-                new_avg = ((old_qty * old_avg) + (qty * price)) / new_qty if new_qty > 0 else 0
-            else:  # Covering short position
-                new_qty = old_qty + qty
-                if new_qty >= 0:  # Now long
-                    new_avg = price
-                else:  # Still short
-                    new_avg = old_avg
-        else:  # Sell
-            if old_qty > 0:  # Reducing long position
-                new_qty = old_qty + qty
-                new_avg = old_avg
-            else:  # Adding to short position
-                new_qty = old_qty + qty
-                new_avg = price
-        
-        pos["qty"] = new_qty
-        pos["avg"] = new_avg
+        # Update lots and position
+        realized = self.lots.fill(symbol, qty, price)
+        self.realized_pnl += realized
+        new_qty, new_avg = self.lots.position(symbol)
         
-        # Clean up zero positions
         if new_qty == 0:
-            del self.positions[symbol]
+            # Clean up zero positions
+            self.positions.pop(symbol, None)
+        elif symbol in self.positions:
+            self.positions[symbol]["qty"] = new_qty
+            self.positions[symbol]["avg"] = new_avg
+        else:
+            self.positions[symbol] = {"qty": new_qty, "avg": new_avg}
         
         # Log the trade
         trade_type = "BUY" if qty > 0 else "SELL"
@@ -82,9 +70,61 @@ class Portfolio:
             "quantity": abs(qty),
             "price": price,
             "total_value": total_value,
+            "realized_pnl": realized,
             "cash_after": self.cash
         })
     
+    def apply_fills(self, symbols, qtys, prices):
+        """
+        Apply a batch of trade fills to the portfolio.
+        Cash is settled in one array pass and each position is written once;
+        only the lot book and the trade ledger are updated per fill.
+        
+        Args:
+            symbols: Symbols being traded
+            qtys: Quantities (positive for buy, negative for sell)
+            prices: Fill prices
+        """
+        fills = [(symbol, qty, price) for symbol, qty, price in zip(symbols, qtys, prices) if qty != 0]
+        if not fills:
+            return
+        symbols, qtys, prices = zip(*fills)
+        
+        # Running cash after each fill, in fill order
+        notional = np.multiply(qtys, prices, dtype=float)
+        cash_after = np.cumsum(np.r_[self.cash, -notional])[1:]
+        self.cash = float(cash_after[-1])
+        
+        # Lots and ledger
+        timestamp = getattr(self, '_current_timestamp', None)
+        fill = self.lots.fill
+        trades = self.trade_history
+        for symbol, qty, price, total_value, cash in zip(symbols, qtys, prices, np.abs(notional).tolist(),
+                                                         cash_after.tolist()):
+            realized = fill(symbol, qty, price)
+            self.realized_pnl += realized
+            trades.append({
+                "timestamp": timestamp,
+                "symbol": symbol,
+                "type": "BUY" if qty > 0 else "SELL",
+                "quantity": abs(qty),
+                "price": price,
+                "total_value": total_value,
+                "realized_pnl": realized,
+                "cash_after": cash
+            })
+        
+        # Positions, once per symbol
+        for symbol in dict.fromkeys(symbols):
+            new_qty, new_avg = self.lots.position(symbol)
+            if new_qty == 0:
+                self.positions.pop(symbol, None)
+            elif symbol in self.positions:
+                self.positions[symbol]["qty"] = new_qty
+                self.positions[symbol]["avg"] = new_avg
+            else:
+                self.positions[symbol] = {"qty": new_qty, "avg": new_avg}
+    
     def mark_to_market(self, timestamp, data):
         """
         Mark portfolio to market at current prices.
@@ -100,9 +140,8 @@ class Portfolio:
         else:
             symbols = list(data.keys())
         
-        # Calculate current equity
-        equity = self.cash
-        
+        # Look up current prices for held symbols
+        prices = {}
         for symbol in symbols:
             if symbol in self.positions and self.positions[symbol]["qty"] != 0:
                 # Get current price for this symbol
@@ -110,9 +149,30 @@ class Portfolio:
                 current_bar = df[df['timestamp'] == timestamp]
                 
                 if not current_bar.empty:
-                    current_price = float(current_bar.iloc[0]['close'])
-                    position_value = self.positions[symbol]["qty"] * current_price
-                    equity += position_value
+                    prices[symbol] = float(current_bar.iloc[0]['close'])
+        
+        self.mark_to_market_prices(timestamp, prices)
+    
+    def mark_to_market_prices(self, timestamp, prices):
+        """
+        Mark portfolio to market from already-known prices.
+        Used by streaming mode, where no DataFrame lookup is available.
+        
+        Args:
+            timestamp: Current timestamp
+            prices: dict {symbol: latest price}
+        """
+        # Calculate current equity
+        equity = self.cash
+        unrealized = 0.0
+        
+        for symbol, pos in self.positions.items():
+            if pos["qty"] != 0 and symbol in prices:
+                position_value = pos["qty"] * prices[symbol]
+                equity += position_value
+                unrealized += position_value - self.lots.cost_basis(symbol)
+        
+        self.unrealized_pnl = unrealized
         
         # Calculate daily P&L
         if self.equity_history:
@@ -152,3 +212,11 @@ class Portfolio:
         initial = self.equity_history[0][1]
         current = self.equity_history[-1][1]
         return ((current - initial) / initial) * 100 if initial > 0 else 0
+    
+    def get_realized_pnl(self):
+        """Get realized P&L since inception."""
+        return self.realized_pnl
+    
+    def get_unrealized_pnl(self):
+        """Get unrealized P&L of open positions as of the last mark."""
+        return self.unrealized_pnl
@@ -0,0 +1,302 @@
+# backtestr/reports/report.py
+import html
+import json
+
+import numpy as np
+import pandas as pd
+
+
+MIN_POINTS = {"lttb": 3, "minmax": 4}  # Smallest budget each method can honour
+
+
+def minmax_downsample(y, max_points):
+    """
+    Pick the min and max of each bucket, preserving peaks and troughs.
+
+    Args:
+        y: Values to downsample
+        max_points: Upper bound on the number of points kept (at least 4)
+
+    Returns:
+        np.ndarray: Sorted indices of the points to keep
+    """
+    if max_points < MIN_POINTS["minmax"]:
+        raise ValueError(f"minmax downsampling needs max_points >= {MIN_POINTS['minmax']}, got {max_points}")
+
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+
+    # Two points per bucket, plus the first and last point
+    buckets = max(1, (max_points - 2) // 2)
+    size = -(-n // buckets)
+    buckets = -(-n // size)  # Drop buckets the rounding would leave empty
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(buckets, size)
+
+    offsets = np.arange(buckets) * size
+    lows = offsets + np.nanargmin(padded, axis=1)
+    highs = offsets + np.nanargmax(padded, axis=1)
+    return np.unique(np.concatenate([[0, n - 1], lows, highs]))
+
+
+def lttb(x, y, max_points):
+    """
+    Largest-Triangle-Three-Buckets downsampling, preserving the visual shape of a curve.
+
+    Args:
+        x: Monotonic x values (e.g. epoch milliseconds)
+        y: Values to downsample
+        max_points: Number of points kept (at least 3: first, last and one per bucket)
+
+    Returns:
+        np.ndarray: Sorted indices of the points to keep
+    """
+    if max_points < MIN_POINTS["lttb"]:
+        raise ValueError(f"LTTB downsampling needs max_points >= {MIN_POINTS['lttb']}, got {max_points}")
+
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # Interior points split into max_points - 2 buckets; one point is kept from each
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    # Mean of the next bucket for every bucket, computed in one pass
+    csum_x = np.r_[0.0, np.cumsum(x)]
+    csum_y = np.r_[0.0, np.cumsum(y)]
+    next_start = edges[1:]
+    next_end = np.r_[edges[2:], n]
+    counts = next_end - next_start
+    avg_x = (csum_x[next_end] - csum_x[next_start]) / counts
+    avg_y = (csum_y[next_end] - csum_y[next_start]) / counts
+
+    # Each bucket depends on the previous pick; the loop is over buckets, not points
+    prev = 0
+    for b in range(max_points - 2):
+        start, end = edges[b], edges[b + 1]
+        bx = x[start:end]
+        by = y[start:end]
+        area = np.abs((x[prev] - avg_x[b]) * (by - y[prev]) - (x[prev] - bx) * (avg_y[b] - y[prev]))
+        prev = start + int(np.argmax(area))
+        selected[b + 1] = prev
+    return selected
+
+
+class ReportGenerator:
+    """
+    Builds JSON and HTML reports of equity, drawdown and trade markers.
+    Curves are downsampled to a fixed point budget so reports render in bounded
+    time and size however long the run; full resolution is available on request.
+    """
+
+    def __init__(self, portfolio, max_points=2000, max_markers=500, method="lttb"):
+        """
+        Initialize the report generator.
+
+        Args:
+            portfolio: Portfolio after the run completed
+            max_points: Point budget per downsampled curve (at least 3 for lttb, 4 for minmax)
+            max_markers: Maximum number of trade markers drawn
+            method: Downsampling method, "lttb" or "minmax"
+        """
+        if method not in MIN_POINTS:
+            raise ValueError(f"Unknown downsampling method: {method}")
+        if max_points < MIN_POINTS[method]:
+            raise ValueError(f"max_points must be at least {MIN_POINTS[method]} for {method}, got {max_points}")
+
+        self.portfolio = portfolio
+        self.max_points = max_points
+        self.max_markers = max_markers
+        self.method = method
+
+        # The first equity entry is the (None, initial_cash) seed, not a bar
+        history = [entry for entry in portfolio.equity_history if entry[0] is not None]
+        self.times_ms = _epoch_ms([ts for ts, _ in history])
+        self.equity = np.fromiter((equity for _, equity in history), dtype=float, count=len(history))
+        peaks = np.maximum.accumulate(self.equity) if len(self.equity) else self.equity
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.drawdown = np.where(peaks > 0, self.equity / peaks - 1, 0.0)
+
+    def summary(self):
+        """
+        Get headline metrics for the run.
+
+        Returns:
+            dict: Initial/final equity, total return, max drawdown, bars and trades
+        """
+        initial = self.portfolio.equity_history[0][1] if self.portfolio.equity_history else 0
+        final = float(self.equity[-1]) if len(self.equity) else initial
+        return {
+            "initial_equity": initial,
+            "final_equity": final,
+            "total_return": final - initial,
+            "total_return_pct": (final - initial) / initial * 100 if initial > 0 else 0,
+            "max_drawdown_pct": float(self.drawdown.min()) * 100 if len(self.drawdown) else 0,
+            "bars": len(self.equity),
+            "trades": len(self.portfolio.trade_history),
+        }
+
+    def to_dict(self, full=False):
+        """
+        Build the report data.
+
+        Args:
+            full: Export every bar and trade instead of downsampled curves
+
+        Returns:
+            dict: Summary, equity and drawdown curves (epoch ms, value) and trade markers
+        """
+        if full:
+            idx = np.arange(len(self.equity))
+            dd_idx = idx
+        else:
+            idx = self._downsample(self.equity)
+            dd_idx = self._downsample(self.drawdown)
+
+        return {
+            "summary": self.summary(),
+            "equity": {"t": self.times_ms[idx].tolist(), "v": self.equity[idx].tolist()},
+            "drawdown": {"t": self.times_ms[dd_idx].tolist(), "v": self.drawdown[dd_idx].tolist()},
+            "trades": self._markers(full),
+        }
+
+    def to_json(self, path, full=False):
+        """
+        Write the report as JSON.
+
+        Args:
+            path: Output file path
+            full: Export every bar and trade instead of downsampled curves
+        """
+        with open(path, "w") as f:
+            json.dump(self.to_dict(full), f)
+
+    def to_csv(self, path):
+        """
+        Export the full-resolution equity and drawdown curves as CSV.
+
+        Args:
+            path: Output file path
+        """
+        pd.DataFrame({
+            "timestamp": np.datetime_as_string(self.times_ms.astype("datetime64[ms]"), unit="ms", timezone="UTC"),
+            "equity": self.equity,
+            "drawdown": self.drawdown,
+        }).to_csv(path, index=False)
+
+    def to_html(self, path, title="Backtest Report", width=1000, height=320):
+        """
+        Write a self-contained HTML report with inline SVG charts.
+
+        Args:
+            path: Output file path
+            title: Report title
+            width: Chart width in pixels
+            height: Equity chart height in pixels (drawdown chart is half)
+        """
+        # Never draw more points than there are pixel columns to show them
+        budget = max(min(self.max_points, 2 * width), MIN_POINTS[self.method])
+        idx = self._downsample(self.equity, budget)
+        dd_idx = self._downsample(self.drawdown, budget)
+        markers = self._markers(False)
+
+        x_range = (self.times_ms[0], self.times_ms[-1]) if len(self.times_ms) else (0, 1)
+        y_range = _padded_range(self.equity[idx])
+        equity_svg = _svg_chart(self.times_ms[idx], self.equity[idx], x_range, y_range, width, height,
+                                "#2a6fdb", markers)
+        drawdown_svg = _svg_chart(self.times_ms[dd_idx], self.drawdown[dd_idx] * 100, x_range,
+                                  _padded_range(self.drawdown[dd_idx] * 100), width, height // 2, "#d9534f")
+
+        rows = "".join(
+            f"<tr><td>{html.escape(key)}</td><td>{value:,.2f}</td></tr>"
+            for key, value in self.summary().items()
+        )
+        with open(path, "w") as f:
+            f.write(
+                f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{html.escape(title)}</title>"
+                "<style>body{font-family:sans-serif;margin:24px}td{padding:2px 12px}</style></head><body>"
+                f"<h1>{html.escape(title)}</h1><table>{rows}</table>"
+                f"<h2>Equity</h2>{equity_svg}<h2>Drawdown (%)</h2>{drawdown_svg}"
+                "</body></html>"
+            )
+
+    def _downsample(self, y, max_points=None):
+        """Pick indices of the points to keep for a curve."""
+        max_points = max_points or self.max_points
+        if self.method == "minmax":
+            return minmax_downsample(y, max_points)
+        return lttb(self.times_ms, y, max_points)
+
+    def _markers(self, full):
+        """Build trade markers, thinned evenly to max_markers unless full."""
+        trades = self.portfolio.trade_history
+        if not full and len(trades) > self.max_markers:
+            keep = np.linspace(0, len(trades) - 1, self.max_markers).astype(np.int64)
+            trades = [trades[i] for i in keep]
+
+        trades = [t for t in trades if t["timestamp"] is not None]
+        if not trades or not len(self.times_ms):
+            return []
+
+        # Place each marker on the equity curve at its bar
+        t_ms = _epoch_ms([t["timestamp"] for t in trades])
+        bar = np.clip(np.searchsorted(self.times_ms, t_ms), 0, len(self.equity) - 1)
+        return [
+            {"t": int(ms), "equity": float(self.equity[b]), "symbol": t["symbol"], "type": t["type"],
+             "quantity": t["quantity"], "price": t["price"]}
+            for ms, b, t in zip(t_ms, bar, trades)
+        ]
+
+
+def _epoch_ms(timestamps):
+    """Convert timestamps to UTC epoch milliseconds."""
+    if not timestamps:
+        return np.zeros(0, dtype=np.int64)
+    index = pd.DatetimeIndex(timestamps)
+    if index.tz is not None:
+        index = index.tz_convert(None)
+    return index.values.astype("datetime64[ms]").astype(np.int64)
+
+
+def _padded_range(values):
+    """Get a (low, high) range with a little headroom for plotting."""
+    if not len(values):
+        return 0.0, 1.0
+    low, high = float(np.nanmin(values)), float(np.nanmax(values))
+    pad = (high - low) * 0.05 or abs(high) * 0.05 or 1.0
+    return low - pad, high + pad
+
+
+def _svg_chart(x, y, x_range, y_range, width, height, color, markers=None):
+    """Render a polyline (and optional trade markers) as an inline SVG."""
+    def scale(xs, ys):
+        span_x = (x_range[1] - x_range[0]) or 1
+        px = (np.asarray(xs, dtype=float) - x_range[0]) / span_x * width
+        py = height - (np.asarray(ys, dtype=float) - y_range[0]) / (y_range[1] - y_range[0]) * height
+        return px, py
+
+    px, py = scale(x, y)
+    points = " ".join(f"{a:.1f},{b:.1f}" for a, b in zip(px, py))
+    parts = [
+        f"<svg width='{width}' height='{height}' style='border:1px solid #ddd'>",
+        f"<polyline fill='none' stroke='{color}' stroke-width='1' points='{points}'/>",
+    ]
+
+    if markers:
+        mx, my = scale([m["t"] for m in markers], [m["equity"] for m in markers])
+        for m, a, b in zip(markers, mx, my):
+            fill = "#28a745" if m["type"] == "BUY" else "#dc3545"
+            parts.append(f"<circle cx='{a:.1f}' cy='{b:.1f}' r='3' fill='{fill}'>"
+                         f"<title>{m['type']} {m['quantity']} {html.escape(str(m['symbol']))} "
+                         f"@ {m['price']:.2f}</title></circle>")
+
+    parts.append("</svg>")
+    return "".join(parts)
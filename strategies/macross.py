@@ -32,8 +32,10 @@ class MACross:
         if current_price is None:
             return
         
-        # Add current price to history
+        # Add current price to history, keeping only what the averages need
         self.price_history.append(current_price)
+        if len(self.price_history) > max(self.short_window, self.long_window):
+            del self.price_history[0]
         
         # Need enough data for moving averages
         if len(self.price_history) < self.long_window:
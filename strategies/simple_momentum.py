@@ -29,8 +29,10 @@ class SimpleMomentum:
         if current_price is None:
             return
         
-        # Add current price to history
+        # Add current price to history, keeping only the lookback window
         self.price_history.append(current_price)
+        if len(self.price_history) > self.lookback + 1:
+            del self.price_history[0]
         
         # Need enough data for momentum calculation
         if len(self.price_history) < self.lookback + 1: